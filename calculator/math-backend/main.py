@@ -2,10 +2,14 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import sympy as sp
+import ast
+import asyncio
 import math
+import operator
 import re
 import os
 import logging
+import functools
 from typing import Union
 from dotenv import load_dotenv
 
@@ -16,6 +20,17 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns used on every request
+_LOG_RE = re.compile(r'\blog\(([^)]+)\)')
+_LN_RE = re.compile(r'\bln\(([^)]+)\)')
+_VALID_RE = re.compile(r'^[\s0-9+\-*/().,\^a-zA-Z_]*$')
+_NAME_RE = re.compile(r'[A-Za-z_]\w*')
+_GLUED_NAME_RE = re.compile(r'#[A-Za-z_]')  # a name stuck to a number, e.g. 2x
+_PI_RE = re.compile(r'\bpi\b')
+_E_RE = re.compile(r'(?<![\w.])e\b')  # not the exponent in 1.e+5
+_NUM_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_SIMPLE_BINOP_RE = re.compile(r'^([-+]?\d+(?:\.\d+)?)\s*([+\-*/])\s*([-+]?\d+(?:\.\d+)?)$')
+
 app = FastAPI(title="AI Calculator API", description="A calculator with AI-powered and SymPy fallback mathematical operations")
 
 # Enable CORS for Next.js frontend
@@ -23,8 +38,8 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # Next.js default port
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],       # POST /calculate, GET /health etc.
+    allow_headers=["Content-Type"],
 )
 
 class CalculationRequest(BaseModel):
@@ -37,12 +52,32 @@ class CalculationResponse(BaseModel):
     ai_available: bool
 
 # Initialize Gemini AI client
+AI_TIMEOUT_MS = 10000
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _http2_available = True
+except ImportError:
+    _http2_available = False
+
 try:
     from google import genai
+    from google.genai import types as genai_types
+    import httpx
 
     gemini_api_key = os.getenv('GEMINI_API_KEY')
     if gemini_api_key:
-        client = genai.Client(api_key=gemini_api_key)
+        # One pooled, keep-alive HTTP/2 connection set shared by every request
+        client = genai.Client(
+            api_key=gemini_api_key,
+            http_options=genai_types.HttpOptions(
+                timeout=AI_TIMEOUT_MS,
+                async_client_args={
+                    "http2": _http2_available,
+                    "limits": httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                },
+            ),
+        )
         model_id = "gemini-1.5-flash-8b"  # Using free alternative model
         ai_available = True
         logger.info("Gemini AI initialized successfully")
@@ -56,112 +91,385 @@ except Exception as e:
     ai_available = False
     logger.error(f"Failed to initialize Gemini AI: {e}")
 
-def evaluate_with_ai(expression: str) -> Union[float, str]:
-    """
-    Evaluate mathematical expressions using Gemini AI
-    """
-    try:
-        if not ai_available:
-            raise Exception("AI service not available")
-
-        # Create a prompt for mathematical evaluation
-        prompt = f"""
-        You are a precise mathematical calculator. Evaluate this expression exactly:
+# Micro-batching: concurrent AI requests arriving within the window share one Gemini call
+BATCH_WINDOW_MS = 15
+BATCH_MAX_SIZE = 16
 
-        {expression}
+_BATCH_PREFIX_RE = re.compile(r'^\s*\d+\)\s*')
 
-        CRITICAL REQUIREMENTS:
-        - Use radians for all trigonometric functions (sin, cos, tan)
-        - Use natural logarithm for ln() and base-10 for log()
-        - Return ONLY the final numerical result as a decimal number
-        - Be precise to at least 4 decimal places
-        - If invalid, return "Error: [reason]"
+_ai_queue = None
+_ai_batcher_task = None
+_ai_batch_tasks = set()
 
-        Calculate this step by step and return only the final number.
-        """
-
-        response = client.models.generate_content(
+def _parse_ai_result(result_text: str) -> Union[float, str]:
+    """
+    Parse a line of AI output; the whole line must be a single finite number
+    """
+    try:
+        number_match = _NUM_RE.fullmatch(result_text.strip())
+        if number_match:
+            parsed_result = float(number_match.group())
+            if not math.isfinite(parsed_result):
+                return f"AI Error: Non-finite result: {result_text}"
+            rounded_result = round(parsed_result, 4)  # Round AI results to 4 decimals to hide LLM noise
+            logger.info(f"AI parsed result: {parsed_result}, rounded: {rounded_result}")
+            return rounded_result
+        else:
+            return f"AI Error: Non-numerical result: {result_text}"
+    except ValueError:
+        return f"AI Error: Non-numerical result: {result_text}"
+
+# Keep prompts and outputs short: Gemini latency scales with token count
+AI_MAX_OUTPUT_TOKENS = 16
+
+def _build_prompt(expressions: list) -> str:
+    if len(expressions) == 1:
+        return f"Evaluate (radians, ln=natural, log=base 10): {expressions[0]}\nReturn only the number, or Error if invalid."
+
+    numbered = "\n".join(f"{i}) {expr}" for i, expr in enumerate(expressions, 1))
+    return (
+        "Evaluate each (radians, ln=natural, log=base 10). "
+        "Return only the numbers, one per line, in order, without numbering "
+        "(Error for invalid ones):\n"
+        f"{numbered}"
+    )
+
+async def _evaluate_batch_with_ai(expressions: list) -> list:
+    """
+    Evaluate a batch of expressions with a single Gemini call
+    """
+    try:
+        response = await client.aio.models.generate_content(
             model=model_id,
-            contents=prompt,
+            contents=_build_prompt(expressions),
             config={
                 "temperature": 0.1,  # Low temperature for consistent mathematical results
-                "max_output_tokens": 100
+                "max_output_tokens": AI_MAX_OUTPUT_TOKENS * len(expressions),
+                "response_mime_type": "text/plain"
             }
         )
 
         # Extract the result from the response
-        if response.candidates and len(response.candidates) > 0:
-            result_text = response.candidates[0].content.parts[0].text.strip()
-            logger.info(f"AI raw response: '{result_text}'")  # Debug: see full AI response
+        if not (response.candidates and len(response.candidates) > 0):
+            return ["AI Error: No response generated"] * len(expressions)
 
-            # Try to parse as float
-            try:
-                # Remove any extra text and extract number
-                import re
-                number_match = re.search(r'[-+]?(?:\d*\.\d+|\d+\.?\d*)', result_text)
-                if number_match:
-                    parsed_result = float(number_match.group())
-                    rounded_result = round(parsed_result, 4)  # Round AI results to 4 decimals too
-                    logger.info(f"AI parsed result: {parsed_result}, rounded: {rounded_result}")
-                    return rounded_result
-                else:
-                    return f"AI Error: Could not extract numerical result from: {result_text}"
-            except ValueError:
-                return f"AI Error: Non-numerical result: {result_text}"
-        else:
-            return "AI Error: No response generated"
+        result_text = response.candidates[0].content.parts[0].text.strip()
+        logger.info(f"AI raw response: '{result_text}'")  # Debug: see full AI response
+
+        if len(expressions) == 1:
+            return [_parse_ai_result(result_text)]
+
+        lines = [_BATCH_PREFIX_RE.sub('', line) for line in result_text.splitlines() if line.strip()]
+        if len(lines) != len(expressions):
+            return [f"AI Error: Expected {len(expressions)} results, got {len(lines)}"] * len(expressions)
+        return [_parse_ai_result(line) for line in lines]
 
     except Exception as e:
         logger.error(f"AI evaluation failed: {e}")
-        return f"AI Error: {str(e)}"
+        return [f"AI Error: {str(e)}"] * len(expressions)
+
+async def _run_batch(batch: list):
+    results = await _evaluate_batch_with_ai([expr for expr, _ in batch])
+    for (_, future), result in zip(batch, results):
+        if not future.done():
+            future.set_result(result)
+
+async def _ai_batcher():
+    """
+    Collect queued expressions for up to BATCH_WINDOW_MS (or BATCH_MAX_SIZE items)
+    and dispatch each batch as one Gemini call
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _ai_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_MS / 1000
+        while len(batch) < BATCH_MAX_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_ai_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        if len(batch) > 1:
+            logger.info(f"Dispatching AI batch of {len(batch)} expressions")
+        # Don't hold up the next window while this batch is in flight
+        task = asyncio.create_task(_run_batch(batch))
+        _ai_batch_tasks.add(task)
+        task.add_done_callback(_ai_batch_tasks.discard)
+
+async def _enqueue(expression: str) -> Union[float, str]:
+    global _ai_queue, _ai_batcher_task
+    if _ai_batcher_task is None or _ai_batcher_task.done():
+        _ai_queue = asyncio.Queue()
+        _ai_batcher_task = asyncio.create_task(_ai_batcher())
+
+    future = asyncio.get_running_loop().create_future()
+    await _ai_queue.put((expression, future))
+    return await future
+
+async def evaluate_with_ai(expression: str) -> Union[float, str]:
+    """
+    Evaluate mathematical expressions using Gemini AI
+    Concurrent calls are coalesced into micro-batches
+    """
+    if not ai_available:
+        logger.error("AI evaluation failed: AI service not available")
+        return "AI Error: AI service not available"
+
+    # One line per expression: embedded newlines would inject fake batch items
+    return await _enqueue(" ".join(expression.split()))
+
+# Define allowed functions and constants
+_ALLOWED_FUNCTIONS = {
+    'sin': sp.sin,
+    'cos': sp.cos,
+    'tan': sp.tan,
+    'sqrt': sp.sqrt,
+    'log': sp.log,        # can take base as second argument
+    'exp': sp.exp,
+    'abs': sp.Abs,
+    'pi': sp.pi,
+    'e': sp.E,
+    'factorial': sp.factorial,
+    'asin': sp.asin,
+    'acos': sp.acos,
+    'atan': sp.atan,
+    'log10': lambda x: sp.log(x, 10),
+}
+
+@functools.lru_cache(maxsize=2048)
+def _parse_and_eval(cleaned: str) -> float:
+    """
+    Parse and evaluate an already-cleaned expression with SymPy.
+    Pure function of its argument, so repeat expressions are served from the cache.
+    """
+    # Use sympify to parse the expression safely
+    parsed_expr = sp.sympify(cleaned, locals=_ALLOWED_FUNCTIONS)
+    # Double precision is all float() keeps, so don't ask mpmath for more
+    return float(parsed_expr.evalf(n=15))
+
+def _fast_log(x, base=None):
+    # math.log(x, 10) divides two natural logs and is inexact for powers of 10
+    if base is None:
+        return math.log(x)
+    if base == 10:
+        return math.log10(x)
+    return math.log(x, base)
+
+def _fast_factorial(n):
+    # Anything above 170! overflows a float; don't compute it on the event loop
+    if n > 170:
+        raise OverflowError("factorial result too large for a float")
+    return math.factorial(n)
+
+# Plain-float counterparts of the allowed functions and constants for the fast path
+_FAST_FUNCTIONS = {
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'sqrt': math.sqrt,
+    'log': _fast_log,     # can take base as second argument
+    'log10': math.log10,
+    'exp': math.exp,
+    'abs': abs,
+    'factorial': _fast_factorial,
+    'asin': math.asin,
+    'acos': math.acos,
+    'atan': math.atan,
+}
+
+_FAST_CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e,
+}
+
+_FAST_BINOP_TYPES = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_FAST_UNARYOP_TYPES = (ast.UAdd, ast.USub)
+
+# Globals for compiled expressions; no builtins beyond the whitelist
+_FAST_NAMESPACE = {
+    '__builtins__': {},
+    **_FAST_FUNCTIONS,
+    **_FAST_CONSTANTS,
+    '_pow': math.pow,     # float pow raises instead of going complex or unbounded
+}
+
+# Numeric literals, but not digits inside names like log10
+_LITERAL_RE = re.compile(r'(?<![\w.])(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+_SIMPLE_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+def _check_fast_node(node: ast.AST, params: frozenset):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return
+    if isinstance(node, ast.BinOp) and isinstance(node.op, _FAST_BINOP_TYPES):
+        _check_fast_node(node.left, params)
+        _check_fast_node(node.right, params)
+        return
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, _FAST_UNARYOP_TYPES):
+        _check_fast_node(node.operand, params)
+        return
+    if isinstance(node, ast.Name) and (node.id in _FAST_CONSTANTS or node.id in params):
+        return
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _FAST_FUNCTIONS and not node.keywords):
+        for arg in node.args:
+            _check_fast_node(arg, params)
+        return
+    raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+class _PowToCall(ast.NodeTransformer):
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.Call(func=ast.Name(id='_pow', ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        return node
+
+@functools.lru_cache(maxsize=1024)
+def _compile_shape(shape: str, n_consts: int):
+    """
+    Compile an expression skeleton (numeric literals replaced by _c0, _c1, ...)
+    into a native function of those literals. Cached per shape, so e.g.
+    sin(1)+2 and sin(3)+4 share one compiled function.
+    """
+    params = [f'_c{i}' for i in range(n_consts)]
+    tree = ast.parse(shape, mode='eval')
+    _check_fast_node(tree.body, frozenset(params))
+
+    body = _PowToCall().visit(tree.body)
+    func = ast.Expression(body=ast.Lambda(
+        args=ast.arguments(posonlyargs=[], args=[ast.arg(arg=p) for p in params],
+                           kwonlyargs=[], kw_defaults=[], defaults=[]),
+        body=body,
+    ))
+    ast.fix_missing_locations(func)
+    return eval(compile(func, '<expression>', 'eval'), _FAST_NAMESPACE)
+
+def _templatize(expr: str):
+    """
+    Split an expression into its shape string and the numeric literals it contains
+    """
+    consts = []
+
+    def placeholder(match):
+        text = match.group()
+        consts.append(int(text) if text.isdigit() else float(text))
+        return f'_c{len(consts) - 1}'
+
+    return _LITERAL_RE.sub(placeholder, expr), consts
+
+def _fast_eval(expr: str) -> float:
+    """
+    Evaluate a cleaned expression with native floats and the math module,
+    bypassing SymPy. Raises on anything outside the whitelist so the caller
+    can fall back to SymPy.
+    """
+    if '_' in expr:
+        # Keep user input from naming the _c0.. placeholders or _pow
+        raise ValueError("Unsupported name")
+    shape, consts = _templatize(expr)
+    return float(_compile_shape(shape, len(consts))(*consts))
 
-def safe_eval_expression(expression: str) -> Union[float, str]:
+def _trivial_eval(expr: str) -> Union[float, None]:
     """
-    Safely evaluate mathematical expressions using SymPy (fallback method)
-    Supports: +, -, *, /, **, sqrt, sin, cos, tan, log, ln, exp, abs
+    Handle bare numbers and a single binary operation between two numbers.
+    Returns None when the expression needs a real evaluator.
     """
     try:
-        # Clean the expression
-        expression = expression.strip()
-
-        # Replace common mathematical notation
-        expression = re.sub(r'\blog\(([^)]+)\)', r'log(\1, 10)', expression)  # log(x) -> log(x, 10)
-        expression = re.sub(r'\bln\(([^)]+)\)', r'log(\1)', expression)       # ln(x) -> log(x)
-        expression = expression.replace('^', '**')            # ^ -> **
-
-        # Create sympy symbols for common constants
-        x, y, z = sp.symbols('x y z')
-
-        # Define allowed functions and constants
-        allowed_functions = {
-            'sin': sp.sin,
-            'cos': sp.cos,
-            'tan': sp.tan,
-            'sqrt': sp.sqrt,
-            'log': sp.log,        # can take base as second argument
-            'exp': sp.exp,
-            'abs': sp.Abs,
-            'pi': sp.pi,
-            'e': sp.E,
-            'factorial': sp.factorial,
-            'asin': sp.asin,
-            'acos': sp.acos,
-            'atan': sp.atan,
-        }
+        result = float(expr)
+    except ValueError:
+        match = _SIMPLE_BINOP_RE.match(expr)
+        if not match:
+            return None
+        a, op, b = float(match.group(1)), match.group(2), float(match.group(3))
+        if op == '/' and b == 0:
+            return None
+        result = _SIMPLE_OPS[op](a, b)
+    # float() also accepts "inf"/"nan", which should go through the full path
+    return result if math.isfinite(result) else None
+
+_ALLOWED_NAMES = frozenset(_ALLOWED_FUNCTIONS) | frozenset(_FAST_FUNCTIONS) | {'ln'}
+
+def _validate_expression(expression: str) -> Union[str, None]:
+    """
+    Cheap character and name whitelist check, run before any evaluator.
+    Returns an error message, or None if the expression may be evaluated.
+    """
+    if not expression.strip():
+        return "Empty expression"
+    if not _VALID_RE.match(expression):
+        return "Invalid characters in expression"
+    # Blank out numeric literals so the e in 1e5 isn't taken for a name
+    stripped = _LITERAL_RE.sub('#', expression)
+    if _GLUED_NAME_RE.search(stripped):
+        return "Numbers and names must be separated by an operator"
+    unknown = sorted(set(_NAME_RE.findall(stripped)) - _ALLOWED_NAMES)
+    if unknown:
+        return f"Unknown names in expression: {', '.join(unknown)}"
+    return None
+
+def _clean_expression(expression: str) -> str:
+    # Clean the expression
+    expression = expression.strip()
+
+    # Replace common mathematical notation
+    expression = _LOG_RE.sub(r'log(\1, 10)', expression)  # log(x) -> log(x, 10)
+    expression = _LN_RE.sub(r'log(\1)', expression)       # ln(x) -> log(x)
+    expression = expression.replace('^', '**')            # ^ -> **
+
+    # Fold constants to floats so SymPy builds a purely numeric tree
+    expression = _PI_RE.sub(repr(math.pi), expression)
+    expression = _E_RE.sub(repr(math.e), expression)
+    return expression
+
+def _quick_eval(expression: str) -> Union[float, None]:
+    """
+    Evaluate with the trivial-input short-circuit and the native-float AST
+    evaluator only. Returns None when the expression needs SymPy.
+    """
+    # Trivial inputs (plain numbers, a+b) skip the parse/evaluate pipeline
+    trivial = _trivial_eval(expression.strip())
+    if trivial is not None:
+        return trivial
 
-        # Parse and evaluate the expression
-        try:
-            # Use sympify to parse the expression safely
-            parsed_expr = sp.sympify(expression, locals=allowed_functions)
+    # Fast path: plain float arithmetic, no SymPy involved
+    try:
+        result = _fast_eval(_clean_expression(expression))
+    except (SyntaxError, ValueError, TypeError, ArithmeticError, RecursionError):
+        return None
+    # Float overflow gives inf/nan rather than raising; leave those to SymPy
+    return result if math.isfinite(result) else None
 
-            # Evaluate the expression and round to 4 decimal places
-            result = float(parsed_expr.evalf())
-            rounded_result = round(result, 4)
+# Only parse failures are worth asking the AI about; value errors are final
+_SYMPY_PARSE_ERROR = "SymPy Error: Invalid mathematical expression"
 
-            return rounded_result
+def _sympy_eval(expression: str) -> Union[float, str]:
+    """
+    Evaluate an expression with SymPy only, returning an error string on failure
+    """
+    try:
+        expression = _clean_expression(expression)
 
-        except (ValueError, TypeError, sp.SympifyError) as e:
-            return f"SymPy Error: Invalid mathematical expression - {str(e)}"
+        # Parse and evaluate the expression
+        try:
+            # Cached parse + evaluate; results are returned unrounded
+            result = _parse_and_eval(expression)
+            if not math.isfinite(result):
+                return f"SymPy Error: Could not evaluate expression - result is not a finite number ({result})"
+            return result
+
+        except sp.SympifyError as e:
+            return f"{_SYMPY_PARSE_ERROR} - {str(e)}"
+        except (ValueError, TypeError, ArithmeticError) as e:
+            # Parsed fine but has no real value (zoo, complex, overflow, ...)
+            return f"SymPy Error: Could not evaluate expression - {str(e)}"
 
     except Exception as e:
         return f"SymPy Error: Could not evaluate expression - {str(e)}"
@@ -177,52 +485,39 @@ async def root():
 @app.post("/calculate", response_model=CalculationResponse)
 async def calculate(request: CalculationRequest):
     """
-    Calculate mathematical expressions using AI first, then SymPy fallback
+    Calculate mathematical expressions locally (fast path, then SymPy),
+    falling back to AI only when SymPy cannot parse the expression
+    AI calls are async and blocking SymPy work runs in a worker thread
     Supports basic operations: +, -, *, /, **
     Advanced functions: sin, cos, tan, sqrt, log, ln, exp, abs
     Constants: pi, e
     """
     try:
-        method_used = "sympy"  # Default fallback
-        result = None
-
-        # Try AI first if available
-        if ai_available:
-            logger.info(f"Attempting AI evaluation for: {request.expression}")
-            ai_result = evaluate_with_ai(request.expression)
-
-            # Also get SymPy result for verification
-            sympy_result = safe_eval_expression(request.expression)
-
-            # Check if AI result is valid and close to SymPy result
-            if isinstance(ai_result, (int, float)) and isinstance(sympy_result, (int, float)):
-                # If results are close (within 0.1% or 0.001 absolute), use AI
-                diff = abs(ai_result - sympy_result)
-                relative_diff = diff / max(abs(sympy_result), 1) if sympy_result != 0 else diff
-
-                if relative_diff < 0.001 or diff < 0.001:
-                    result = ai_result
-                    method_used = "ai"
-                    logger.info(f"AI evaluation verified: {result}")
-                else:
-                    result = sympy_result
-                    method_used = "sympy"
-                    logger.warning(f"AI result {ai_result} differs from SymPy {sympy_result}, using SymPy")
-            else:
-                # If AI result is invalid, use SymPy
-                if isinstance(sympy_result, (int, float)):
-                    result = sympy_result
-                    method_used = "sympy"
-                    logger.warning(f"AI evaluation failed: {ai_result}, using SymPy")
-                else:
-                    result = ai_result  # Return AI error if SymPy also failed
-                    method_used = "ai"
-
-        # Fallback to SymPy if AI unavailable
-        if result is None:
-            logger.info(f"Using SymPy fallback for: {request.expression}")
-            result = safe_eval_expression(request.expression)
-            method_used = "sympy"
+        method_used = "sympy"
+
+        # Reject obviously invalid input before touching SymPy or the AI
+        validation_error = _validate_expression(request.expression)
+        if validation_error:
+            raise HTTPException(status_code=400, detail=validation_error)
+
+        # Expressions the cheap local evaluators can answer never go to the AI
+        quick_result = _quick_eval(request.expression)
+        if quick_result is not None:
+            return CalculationResponse(
+                result=quick_result,
+                original_expression=request.expression,
+                method_used="sympy",
+                ai_available=ai_available
+            )
+
+        # Local SymPy next; the AI is only consulted when SymPy cannot parse the input
+        logger.info(f"Using SymPy for: {request.expression}")
+        result = await asyncio.to_thread(_sympy_eval, request.expression)
+
+        if isinstance(result, str) and ai_available and result.startswith(_SYMPY_PARSE_ERROR):
+            logger.warning(f"SymPy evaluation failed: {result}, attempting AI evaluation")
+            result = await evaluate_with_ai(request.expression)
+            method_used = "ai"
 
         return CalculationResponse(
             result=result,
@@ -230,6 +525,8 @@ async def calculate(request: CalculationRequest):
             method_used=method_used,
             ai_available=ai_available
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Calculation error: {e}")
         raise HTTPException(status_code=400, detail=f"Calculation error: {str(e)}")
@@ -254,4 +551,5 @@ async def ai_status():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # One worker per core; "auto" picks uvloop/httptools when installed (not on Windows)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=os.cpu_count(), loop="auto", http="auto")
\ No newline at end of file
@@ -3,6 +3,9 @@
 
 import { useState } from 'react';
 
+// Trim float noise (0.1+0.2 = 0.30000000000000004) by keeping 12 significant digits
+const formatResult = (value) => String(Number(value.toPrecision(12)));
+
 export default function Calculator() {
   // STATE MANAGEMENT: These track what's displayed and what's being calculated
   const [display, setDisplay] = useState('0');        // What user sees on screen
@@ -102,7 +105,7 @@ export default function Calculator() {
       // Handle the response
       if (response.ok) {
         if (typeof data.result === 'number') {
-          setDisplay(data.result.toString());
+          setDisplay(formatResult(data.result));
           setIsResult(true);  // Mark that we're showing a result
         } else {
           setDisplay(data.result);  // This would be an error message
@@ -204,7 +207,7 @@ export default function Calculator() {
                   });
                   const data = await response.json();
                   if (response.ok && typeof data.result === 'number') {
-                    setDisplay(data.result.toString());
+                    setDisplay(formatResult(data.result));
                     setIsResult(true);
                   } else {
                     setDisplay('Error');